@@ -36,7 +36,7 @@ class AuthorSchema(Schema):
         return obj.first + ' ' + obj.last
 
     def format_name(self, author):
-        return "{0}, {1}".format(author.last, author.first)
+        return "%s, %s" % (author.last, author.first)
 
 
 class QuoteSchema(Schema):
@@ -58,6 +58,9 @@ class QuoteSchema(Schema):
 
 
 class Author(object):
+    __slots__ = ('id', 'first', 'last', 'book_count', 'age', 'address',
+                 'deceased')
+
     def __init__(self, id, first, last, book_count, age, address, deceased):
         self.id = id
         self.first = first
@@ -69,6 +72,9 @@ class Author(object):
 
 
 class Quote(object):
+    __slots__ = ('id', 'author', 'content', 'posted_at', 'book_name',
+                 'page_number', 'line_number', 'col_number', 'is_verified')
+
     def __init__(self, id, author, content, posted_at, book_name, page_number,
                  line_number, col_number, is_verified):
         self.id = id
@@ -82,8 +88,23 @@ class Quote(object):
         self.is_verified = is_verified
 
 
+def median(values):
+    """Gets the median of a non empty sequence of numbers."""
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+STATISTICS = {
+    'min': min,
+    'median': median,
+}
+
+
 def run_timeit(quotes, iterations, repeat, jit=False, load=False,
-               profile=False):
+               profile=False, statistic=min):
     quotes_schema = QuoteSchema(many=True)
     if jit:
         quotes_schema.jit = Jit
@@ -91,7 +112,6 @@ def run_timeit(quotes, iterations, repeat, jit=False, load=False,
         profile = cProfile.Profile()
         profile.enable()
     dumped_quotes = quotes_schema.dump(quotes).data
-    gc.collect()
 
     if load:
         def marshmallow_func():
@@ -100,16 +120,26 @@ def run_timeit(quotes, iterations, repeat, jit=False, load=False,
         def marshmallow_func():
             quotes_schema.dump(quotes)
 
-    best = min(timeit.repeat(marshmallow_func,
-                             'gc.enable()',
-                             number=iterations,
-                             repeat=repeat))
+    # Move everything allocated so far out of the collector's reach so runs
+    # aren't charged for traversing the inputs.  gc.freeze is only available
+    # on Python 3.7+.
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    try:
+        elapsed = statistic(timeit.repeat(marshmallow_func,
+                                          'gc.enable()',
+                                          number=iterations,
+                                          repeat=repeat))
+    finally:
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
     if profile:
         profile.disable()
         file_name = 'optimized.pprof' if jit else 'original.pprof'
         profile.dump_stats(file_name)
 
-    usec = best * 1e6 / iterations
+    usec = elapsed * 1e6 / iterations
     return usec
 
 
@@ -120,7 +150,13 @@ def main():
                         help='Number of iterations to run per test.')
     parser.add_argument('--repeat', type=int, default=5,
                         help='Number of times to repeat the performance test. '
-                             'The minimum will be used.')
+                             'The minimum will be used unless --statistic '
+                             'says otherwise.')
+    parser.add_argument('--statistic', choices=sorted(STATISTICS),
+                        default='min',
+                        help='How to summarize the repeated runs.  The '
+                             'median is less sensitive to a single lucky '
+                             'run on a noisy machine.')
     parser.add_argument('--object-count', type=int, default=20,
                         help='Number of objects to dump.')
     parser.add_argument('--profile', action='store_true',
@@ -128,23 +164,27 @@ def main():
                              'running the benchmark.')
     args = parser.parse_args()
 
-    quotes = []
-    for i in range(args.object_count):
-        quotes.append(
-            Quote(i, Author(i, 'Foo', 'Bar', 42, 66, '123 Fake St', False),
-                  'Hello World', time.time(), 'The World', 34, 3, 70, False)
-        )
+    now = time.time()
+    quotes = [
+        Quote(i, Author(i, 'Foo', 'Bar', 42, 66, '123 Fake St', False),
+              'Hello World', now, 'The World', 34, 3, 70, False)
+        for i in range(args.object_count)
+    ]
 
+    statistic = STATISTICS[args.statistic]
     original_dump_time = run_timeit(quotes, args.iterations, args.repeat,
                                     load=False, jit=False,
-                                    profile=args.profile)
+                                    profile=args.profile, statistic=statistic)
     original_load_time = run_timeit(quotes, args.iterations, args.repeat,
-                                    load=True, jit=False, profile=args.profile)
+                                    load=True, jit=False, profile=args.profile,
+                                    statistic=statistic)
     optimized_dump_time = run_timeit(quotes, args.iterations, args.repeat,
                                      load=False, jit=True,
-                                     profile=args.profile)
+                                     profile=args.profile,
+                                     statistic=statistic)
     optimized_load_time = run_timeit(quotes, args.iterations, args.repeat,
-                                     load=True, jit=True, profile=args.profile)
+                                     load=True, jit=True, profile=args.profile,
+                                     statistic=statistic)
     print('Benchmark Result:')
     print('\tOriginal Dump Time: {0:.2f} usec/dump'.format(original_dump_time))
     print('\tOptimized Dump Time: {0:.2f} usec/dump'.format(
@@ -11,14 +11,10 @@ def find_version(fname):
     """Attempts to find the version number in the file names fname.
     Raises RuntimeError if not found.
     """
-    version = ''
     with open(fname, 'r') as fp:
-        reg = re.compile(r'__version__ = [\'"]([^\'"]*)[\'"]')
-        for line in fp:
-            m = reg.match(line)
-            if m:
-                version = m.group(1)
-                break
+        content = fp.read()
+    m = re.search(r'^__version__ = [\'"]([^\'"]*)[\'"]', content, re.M)
+    version = m.group(1) if m else ''
     if not version:
         raise RuntimeError('Cannot find version information')
     return version
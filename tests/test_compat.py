@@ -1,4 +1,4 @@
-from toastedmarshmallow.compat import is_overridden
+from toastedmarshmallow.compat import compile_optimized, is_overridden
 
 
 class Base(object):
@@ -18,3 +18,11 @@ class HasOverride(Base):
 def test_is_overridden():
     assert is_overridden(HasOverride().foo, Base.foo)
     assert not is_overridden(NoOverride().foo, Base.foo)
+
+
+def test_compile_optimized():
+    namespace = {}
+    code = compile_optimized('def foo():\n    return 42', '<test>')
+    assert code.co_filename == '<test>'
+    exec(code, namespace)
+    assert namespace['foo']() == 42
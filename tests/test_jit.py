@@ -1,12 +1,22 @@
+import datetime
+from collections import OrderedDict
+
 import pytest
 from marshmallow import fields, Schema
-from six import text_type
+from marshmallow.orderedset import OrderedSet
+from six import add_metaclass, text_type
 
+import toastedmarshmallow
+from toastedmarshmallow.inliners import (
+    FieldInliner, INLINERS, inliner_for_field)
 from toastedmarshmallow.jit import (
-    attr_str, field_symbol_name, InstanceSerializer, DictSerializer,
-    HybridSerializer,
+    _TYPE_CACHE_SIZE, field_symbol_name, generate_field_plans,
+    generate_field_symbols,
     generate_transform_method_body, generate_method_bodies,
-    generate_marshall_method, generate_unmarshall_method, JitContext)
+    generate_marshall_method, generate_unmarshall_method,
+    JitContext)
+from toastedmarshmallow.serializers import (
+    attr_str, InstanceSerializer, DictSerializer, HybridSerializer)
 
 
 @pytest.fixture()
@@ -117,6 +127,39 @@ def non_primitive_num_type_schema():
 def test_field_symbol_name():
     assert '_field_hello' == field_symbol_name('hello')
     assert '_field_MHdvcmxkMA' == field_symbol_name('0world0')
+    assert '_field_Zm9vLWJhcg' == field_symbol_name('foo-bar')
+
+
+def test_generate_field_symbols(schema):
+    assert {
+        'foo': '_field_foo',
+        'bar': '_field_bar',
+        'raz': '_field_raz',
+        'meh': '_field_meh',
+        'blargh': '_field_blargh',
+    } == generate_field_symbols(schema)
+
+
+def test_generate_field_plans():
+    class PlanSchema(Schema):
+        foo = fields.Integer(attribute='bar', dump_to='baz')
+        raz = fields.Method('get_raz')
+        meh = fields.String(load_only=True)
+
+        def get_raz(self, obj):  # pragma: no cover
+            return obj
+
+    plans = generate_field_plans(PlanSchema(), JitContext())
+    assert ['foo', 'raz'] == sorted(plan.field_name for plan in plans)
+    plan = [x for x in plans if x.field_name == 'foo'][0]
+    assert 'bar' == plan.attr_name
+    assert plan.attr_is_identifier
+    assert 'baz' == plan.result_key
+    assert '_field_foo' == plan.field_symbol
+    assert ('{0} if type({0}) is int else '
+            '(int({0}) if {0} is not None else None)') == plan.inliner
+    plan = [x for x in plans if x.field_name == 'raz'][0]
+    assert plan.inliner is None
 
 
 def test_attr_str():
@@ -136,7 +179,7 @@ def test_dict_serializer_with_default():
     field = fields.Integer(default=3)
     result = str(serializer.serialize('foo', 'bar', 'result["foo"] = {0}',
                                       field))
-    assert 'result["foo"] = obj.get("foo", bar__default)' == result
+    assert 'result["foo"] = __obj_get("foo", bar__default)' == result
 
 
 def test_dict_serializer_with_callable_default():
@@ -144,7 +187,7 @@ def test_dict_serializer_with_callable_default():
     field = fields.Integer(default=int)
     result = str(serializer.serialize('foo', 'bar', 'result["foo"] = {0}',
                                       field))
-    assert 'result["foo"] = obj.get("foo", bar__default())' == result
+    assert 'result["foo"] = __obj_get("foo", bar__default())' == result
 
 
 def test_dict_serializer_no_default():
@@ -170,6 +213,38 @@ def test_hybrid_serializer():
     assert expected == result
 
 
+def test_inliner_for_field():
+    context = JitContext()
+    assert (('{0} if type({0}) is int else '
+             '(int({0}) if {0} is not None else None)') ==
+            inliner_for_field(context, fields.Integer()))
+    assert (('{0} if type({0}) is float else '
+             '(float({0}) if {0} is not None else None)') ==
+            inliner_for_field(context, fields.Float()))
+
+    class CustomInteger(fields.Integer):
+        pass
+    assert (('{0} if type({0}) is int else '
+             '(int({0}) if {0} is not None else None)') ==
+            inliner_for_field(context, CustomInteger()))
+    assert inliner_for_field(context, fields.DateTime()) is None
+    assert inliner_for_field(JitContext(use_inliners=False),
+                             fields.Integer()) is None
+
+
+def test_inliner_for_field_sees_inliners_changes(monkeypatch):
+    class DateTimeInliner(FieldInliner):
+        def inline(self, field, context):
+            return '{0}'
+
+    context = JitContext()
+    assert inliner_for_field(context, fields.DateTime()) is None
+    monkeypatch.setitem(INLINERS, fields.DateTime, DateTimeInliner())
+    assert '{0}' == inliner_for_field(context, fields.DateTime())
+    monkeypatch.undo()
+    assert inliner_for_field(context, fields.DateTime()) is None
+
+
 def test_generate_marshall_method_body(schema):
     expected_start = '''\
 def InstanceSerializer(obj):
@@ -183,19 +258,22 @@ def InstanceSerializer(obj):
         'if "@#" in obj:\n'
         '        value = obj["@#"]; '
         'value = value() if callable(value) else value; '
-        'value = int(value) if value is not None else None; '
+        'value = value if type(value) is int else '
+        '(int(value) if value is not None else None); '
         'res["foo"] = value')
     bar_assignment = (
         'value = obj.bar; '
         'value = value() if callable(value) else value; '
-        'value = {text_type}(value) if value is not None else None; '
+        'value = value if type(value) is {text_type} else '
+        '({text_type}(value) if value is not None else None); '
         'res["bar"] = value').format(text_type=text_type.__name__)
     blargh_assignment = (
         'value = obj.blargh; '
         'value = value() if callable(value) else value; '
-        'value = ((value in __blargh_truthy) or '
-        '(False if value in __blargh_falsy else dict()["error"])) '
-        'if value is not None else None; '
+        'value = value if value is True or value is False else '
+        '(((value in _field_blargh__truthy) or '
+        '(False if value in _field_blargh__falsy else dict()["error"])) '
+        'if value is not None else None); '
         'res["blargh"] = value')
 
     context = JitContext()
@@ -217,29 +295,122 @@ def test_generate_marshall_method_bodies():
     context = JitContext()
     result = generate_method_bodies(OneFieldSchema(), context)
     expected = '''\
-def InstanceSerializer(obj):
-    res = {}
+def InstanceSerializer(obj, callable=callable, int=int, type=type):
     value = obj.foo; value = value() if callable(value) else value; \
-value = int(value) if value is not None else None; res["foo"] = value
+value = value if type(value) is int else \
+(int(value) if value is not None else None); _field_foo__value = value
+    res = {"foo": _field_foo__value}
     return res
-def DictSerializer(obj):
+def DictSerializer(obj, callable=callable, int=int, type=type):
     res = {}
     if "foo" in obj:
         value = obj["foo"]; value = value() if callable(value) else value; \
-value = int(value) if value is not None else None; res["foo"] = value
+value = value if type(value) is int else \
+(int(value) if value is not None else None); res["foo"] = value
     return res
-def HybridSerializer(obj):
-    res = {}
+def HybridSerializer(obj, callable=callable, int=int, type=type):
     try:
         value = obj["foo"]
     except (KeyError, AttributeError, IndexError, TypeError):
         value = obj.foo
     value = value; value = value() if callable(value) else value; \
-value = int(value) if value is not None else None; res["foo"] = value
+value = value if type(value) is int else \
+(int(value) if value is not None else None); _field_foo__value = value
+    res = {"foo": _field_foo__value}
     return res'''
     assert expected == result
 
 
+def test_generate_marshall_method_bodies_bind_symbols():
+    class OneFieldSchema(Schema):
+        class Meta:
+            jit_options = {'no_callable_fields': True}
+        foo = fields.Integer()
+        bar = fields.Method('get_bar')
+
+        def get_bar(self, obj):  # pragma: no cover
+            return obj
+
+    context = JitContext()
+    context.namespace['_field_bar__serialize'] = None
+    context.namespace['_field_foo__serialize'] = None
+    result = generate_method_bodies(OneFieldSchema(), context,
+                                    [InstanceSerializer], many=True)
+    assert ('def InstanceSerializer(obj, '
+            '__marshmallow_missing=__marshmallow_missing, '
+            '_field_bar__serialize=_field_bar__serialize, int=int, '
+            'type=type):'
+            in result)
+    assert ('def InstanceSerializerMany(objs, '
+            '__marshmallow_missing=__marshmallow_missing, '
+            '_field_bar__serialize=_field_bar__serialize, int=int, '
+            'type=type):'
+            in result)
+
+
+def test_generate_marshall_method_body_dict_display(simple_schema):
+    context = JitContext()
+    result = str(generate_transform_method_body(simple_schema,
+                                                DictSerializer(context),
+                                                context))
+    expected = '''\
+def DictSerializer(obj):
+    __obj_get = obj.get
+    value = __obj_get("value", _field_value__default); \
+value = value() if callable(value) else value; \
+value = value if type(value) is int else \
+(int(value) if value is not None else None); _field_value__value = value
+    res = {"value": _field_value__value}
+    if "key" in obj:
+        value = obj["key"]; value = value() if callable(value) else value; \
+value = value if type(value) is %s else \
+(%s(value) if value is not None else None); res["key"] = value
+    return res''' % (text_type.__name__, text_type.__name__)
+    assert expected == result
+
+
+@pytest.mark.parametrize('expected_marshal_type', ['dict', None])
+def test_jitted_marshal_method_dict_display_keeps_field_order(
+        expected_marshal_type):
+    class OrderedFieldsSchema(Schema):
+        class Meta:
+            jit_options = {'expected_marshal_type': expected_marshal_type}
+        # Keeps the fields in declaration order, still dumping into a dict.
+        set_class = OrderedSet
+        c = fields.String()
+        a = fields.Integer()
+        b = fields.Integer(default=0)
+
+    schema = OrderedFieldsSchema()
+    marshal_method = generate_marshall_method(schema)
+    result = marshal_method({'c': 'hello', 'a': 32})
+    assert schema.dump({'c': 'hello', 'a': 32}).data == result
+    assert list(schema.fields) == list(result)
+
+
+def test_dict_serializer_assigns_unconditionally():
+    serializer = DictSerializer()
+    assert serializer.assigns_unconditionally(fields.Integer(default=3))
+    assert not serializer.assigns_unconditionally(fields.Integer())
+
+    serializer = DictSerializer(JitContext(is_serializing=False))
+    assert serializer.assigns_unconditionally(fields.Integer(required=True))
+    assert serializer.assigns_unconditionally(fields.Integer(missing=3))
+    assert not serializer.assigns_unconditionally(fields.Integer())
+    assert InstanceSerializer().assigns_unconditionally(fields.Integer())
+
+
+def test_dict_serializer_uses_get():
+    serializer = DictSerializer()
+    assert serializer.uses_get(fields.Integer(default=3))
+    assert not serializer.uses_get(fields.Integer())
+
+    serializer = DictSerializer(JitContext(is_serializing=False))
+    assert serializer.uses_get(fields.Integer(missing=3))
+    assert not serializer.uses_get(fields.Integer(required=True, missing=3))
+    assert not serializer.uses_get(fields.Integer())
+
+
 def test_generate_unmarshall_method_bodies():
     class OneFieldSchema(Schema):
         foo = fields.Integer()
@@ -285,7 +456,6 @@ def test_generate_unmarshall_method_bodies_with_load_from():
     expected = '''\
 def DictSerializer(obj):
     res = {}
-    __res_get = res.get
     if "foo" in obj:
         res["foo"] = _field_foo__deserialize(obj["foo"], "bar", obj)
     if "foo" not in res:
@@ -346,6 +516,7 @@ def test_jitted_marshal_method(schema):
         'raz': 'Hello!'
     }
     assert expected == result
+    assert isinstance(result, OrderedDict)
     # Test specialization
     result = marshal_method({
         '@#': 32,
@@ -522,3 +693,266 @@ def test_nested_marshal_method(nested_schema):
         ]
     }
     assert expected == result
+
+
+def test_jitted_marshal_method_specializes_across_mapping_types(
+        simple_schema, simple_dict):
+    marshal_method = generate_marshall_method(simple_schema, threshold=2)
+    assert simple_dict == marshal_method(simple_dict)
+    assert marshal_method.proxy._call == marshal_method.proxy.tracing_call
+    assert simple_dict == marshal_method(OrderedDict(simple_dict))
+    assert marshal_method.proxy._call == marshal_method.proxy.dict_serializer
+
+
+def test_jitted_marshal_method_dispatches_on_type(simple_schema,
+                                                  simple_object):
+    class DynamicObject(object):
+        def __init__(self, obj):
+            self.__dict__.update(obj.__dict__)
+
+        def __getattr__(self, name):
+            raise AssertionError('Unexpected lookup of ' + name)
+
+    marshal_method = generate_marshall_method(simple_schema, threshold=0)
+    proxy = marshal_method.proxy
+    expected = marshal_method(simple_object)
+    assert expected == marshal_method(DynamicObject(simple_object))
+    assert proxy._type_cache[DynamicObject] == proxy.instance_serializer
+
+
+def test_jitted_marshal_method_bounds_type_cache(simple_schema,
+                                                 simple_object):
+    marshal_method = generate_marshall_method(simple_schema, threshold=0)
+    proxy = marshal_method.proxy
+    expected = marshal_method(simple_object)
+    for i in range(_TYPE_CACHE_SIZE + 1):
+        # A new class per call, like a `namedtuple` factory would create.
+        object_type = type(str('Object{0}'.format(i)), (object,), {})
+        obj = object_type()
+        obj.__dict__.update(simple_object.__dict__)
+        assert expected == marshal_method(obj)
+        assert len(proxy._type_cache) <= _TYPE_CACHE_SIZE
+
+
+def test_jitted_marshal_method_ignores_metaclass_getitem(
+        simple_schema, simple_object):
+    # Like `EnumMeta`, makes the class subscriptable but not its instances.
+    class SubscriptableMeta(type):
+        def __getitem__(cls, key):  # pragma: no cover
+            return key
+
+    @add_metaclass(SubscriptableMeta)
+    class MetaObject(object):
+        def __init__(self, obj):
+            self.__dict__.update(obj.__dict__)
+
+    marshal_method = generate_marshall_method(simple_schema, threshold=0)
+    proxy = marshal_method.proxy
+    expected = marshal_method(simple_object)
+    assert expected == marshal_method(MetaObject(simple_object))
+    assert proxy._type_cache[MetaObject] == proxy.instance_serializer
+
+
+def test_jitted_marshal_method_only_injects_used_symbols(simple_schema):
+    context = JitContext()
+    generate_marshall_method(simple_schema, context=context)
+    assert '_field_key__serialize' in context.namespace
+    assert '_field_key__deserialize' not in context.namespace
+    assert '_field_key__validate' not in context.namespace
+
+    context = JitContext()
+    generate_unmarshall_method(simple_schema, context=context)
+    assert '_field_key__deserialize' in context.namespace
+    assert '_field_key__validate' in context.namespace
+    assert '_field_key__serialize' not in context.namespace
+
+
+def test_jitted_marshal_method_many_bound_symbols():
+    # Python < 3.7 limits functions to 255 arguments, so not every one of the
+    # symbols of a schema with many non-inlined fields can be bound.
+    field_names = ['field{0}'.format(i) for i in range(300)]
+    big_schema = type(str('BigSchema'), (Schema,),
+                      {name: fields.DateTime() for name in field_names})()
+    marshal_method = generate_marshall_method(big_schema)
+    def_line = marshal_method._source.split('\n')[0]
+    assert def_line.count('__serialize=') < 255
+
+    value = datetime.datetime(2017, 1, 1)
+    expected = {name: '2017-01-01T00:00:00+00:00' for name in field_names}
+    assert expected == marshal_method({name: value for name in field_names})
+
+
+def test_jitted_marshal_method_only_generates_used_methods(optimized_schema,
+                                                           simple_schema):
+    marshal_method = generate_marshall_method(optimized_schema)
+    assert 'def InstanceSerializer(obj' in marshal_method._source
+    assert 'DictSerializer' not in marshal_method._source
+    assert 'HybridSerializer' not in marshal_method._source
+
+    unmarshal_method = generate_unmarshall_method(simple_schema)
+    assert 'def DictSerializer(obj' in unmarshal_method._source
+    assert 'InstanceSerializer' not in unmarshal_method._source
+    assert 'HybridSerializer' not in unmarshal_method._source
+
+
+def test_generate_marshall_many_method_body():
+    class OneFieldSchema(Schema):
+        foo = fields.Integer()
+    context = JitContext()
+    result = str(generate_transform_method_body(OneFieldSchema(),
+                                                InstanceSerializer(context),
+                                                context, many=True))
+    expected = '''\
+def InstanceSerializerMany(objs):
+    results = []
+    __results_append = results.append
+    for obj in objs:
+        value = obj.foo; value = value() if callable(value) else value; \
+value = value if type(value) is int else \
+(int(value) if value is not None else None); _field_foo__value = value
+        res = {"foo": _field_foo__value}
+        __results_append(res)
+    return results'''
+    assert expected == result
+
+
+def test_optimized_jitted_marshal_method_many(optimized_schema,
+                                              simple_object):
+    marshal_method = generate_marshall_method(optimized_schema)
+    assert 'def InstanceSerializerMany(objs' in marshal_method._source
+    result = marshal_method([simple_object, simple_object], many=True)
+    expected = {
+        'key': 'some_key',
+        'value': '42'
+    }
+    assert [expected, expected] == result
+
+
+def test_jitted_marshal_method_reuses_compiled_code(simple_schema,
+                                                    simple_object):
+    first = generate_marshall_method(simple_schema)
+    second = generate_marshall_method(simple_schema.__class__())
+    assert first._source == second._source
+    assert (first.proxy.dict_serializer.__code__ is
+            second.proxy.dict_serializer.__code__)
+    assert (first.proxy.instance_serializer.__code__ is
+            second.proxy.instance_serializer.__code__)
+    assert first(simple_object) == second(simple_object)
+
+
+def test_jitted_marshal_method_names_generated_code(simple_schema):
+    marshal_method = generate_marshall_method(simple_schema)
+    code = marshal_method.proxy.dict_serializer.__code__
+    assert code.co_filename == '<jit:InstanceSchema>'
+
+
+def test_jit_context_defaults_are_not_shared():
+    first = JitContext()
+    second = JitContext()
+    first.namespace['foo'] = 'bar'
+    first.exclude.add('foo')
+    assert second.namespace == {}
+    assert second.exclude == set()
+    assert not hasattr(first, '__dict__')
+
+
+def test_jitted_marshal_method_exact_type_fast_path():
+    class TextSubclass(text_type):
+        pass
+
+    class ConversionSchema(Schema):
+        key = fields.String()
+        value = fields.Integer()
+        flag = fields.Boolean()
+
+    marshal_method = generate_marshall_method(ConversionSchema())
+    result = marshal_method({'key': TextSubclass('foo'), 'value': True,
+                             'flag': False})
+    assert {'key': 'foo', 'value': 1, 'flag': False} == result
+    assert type(result['key']) is text_type
+    assert type(result['value']) is int
+
+
+@pytest.mark.parametrize('expected_marshal_type', ['object', 'dict', None])
+def test_jitted_marshal_method_non_identifier_attribute(
+        expected_marshal_type):
+    meta = type(str('Meta'), (object,), {})
+    if expected_marshal_type:
+        meta.jit_options = {'expected_marshal_type': expected_marshal_type}
+    dashed_schema = type(str('DashedSchema'), (Schema,), {
+        'Meta': meta,
+        'foo_bar': fields.Integer(attribute='foo-bar'),
+        'k-ey': fields.Boolean(),
+    })
+    schema = dashed_schema()
+
+    marshal_method = generate_marshall_method(schema)
+    if expected_marshal_type == 'object':
+        assert 'obj["foo-bar"]' in marshal_method._source
+    assert {'foo_bar': 42} == marshal_method({'foo-bar': 42})
+
+    for value in ({'foo-bar': 42, 'k-ey': True},
+                  {'foo-bar': 42, 'k-ey': 'f'}):
+        assert schema.dump(value).data == marshal_method(value)
+
+    # Instances with non identifier attributes fall back to marshmallow.
+    obj = type(str('DashedObject'), (object,), {})()
+    setattr(obj, 'foo-bar', 42)
+    setattr(obj, 'k-ey', True)
+    jitted_schema = dashed_schema()
+    jitted_schema.jit = toastedmarshmallow.Jit
+    result = jitted_schema.dump(obj)
+    assert not result.errors
+    assert schema.dump(obj).data == result.data
+
+    unmarshal_method = generate_unmarshall_method(schema)
+    for value in ({'foo_bar': 42, 'k-ey': 'true'},
+                  {'foo_bar': 42, 'k-ey': False}):
+        expected = schema.load(value).data
+        assert (value['k-ey'] == 'true') is expected['k-ey']
+        assert expected == unmarshal_method(value)
+
+
+def test_inliner_for_raw_and_list_fields():
+    context = JitContext()
+    assert '{0}' == inliner_for_field(context, fields.Raw())
+    assert ('([_x if type(_x) is int else '
+            '(int(_x) if _x is not None else None) for _x in {0}] '
+            'if type({0}) is list or type({0}) is tuple '
+            'else dict()["error"]) if {0} is not None else None' ==
+            inliner_for_field(context, fields.List(fields.Integer())))
+    assert inliner_for_field(context, fields.List(fields.DateTime())) is None
+    assert inliner_for_field(
+        context, fields.List(fields.List(fields.Integer()))) is None
+    assert inliner_for_field(JitContext(is_serializing=False),
+                             fields.List(fields.Integer())) is None
+
+
+def test_jitted_marshal_method_inlined_lists():
+    class ListSchema(Schema):
+        raw = fields.Raw()
+        ints = fields.List(fields.Integer())
+        flags = fields.List(fields.Boolean())
+
+    schema = ListSchema()
+    marshal_method = generate_marshall_method(schema)
+    assert '_field_ints__serialize' not in marshal_method._source
+    for obj in ({'raw': {'a': 1}, 'ints': [1, 2], 'flags': (True, False)},
+                {'raw': None, 'ints': None, 'flags': []}):
+        assert schema.dump(obj).data == marshal_method(obj)
+    with pytest.raises(KeyError):
+        marshal_method({'ints': 1})
+
+
+def test_boolean_inliner_binds_frozensets():
+    class ListBoolean(fields.Boolean):
+        truthy = ['yes']
+        falsy = ['no', ['unhashable']]
+
+    class BooleanSchema(Schema):
+        flag = ListBoolean()
+
+    context = JitContext()
+    inliner_for_field(context, BooleanSchema().fields['flag'])
+    assert frozenset(['yes']) == context.namespace['_field_flag__truthy']
+    assert ['no', ['unhashable']] == context.namespace['_field_flag__falsy']
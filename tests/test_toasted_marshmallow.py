@@ -49,3 +49,11 @@ def test_marshmallow_integration_invalid_data(schema):
     result = schema.load({'key': 'hello', 'value': 'foo'})
     assert {'value': ['Not a valid integer.']} == result.errors
     assert schema._jit_instance is not None
+
+
+def test_jit_compiles_eagerly(schema):
+    jit = toastedmarshmallow.Jit(schema)
+    assert jit.jitted_marshal_method is jit.marshal_method
+    assert jit.jitted_unmarshal_method is jit.unmarshal_method
+    assert jit.jitted_marshal_method is not None
+    assert jit.jitted_unmarshal_method is not None
@@ -10,6 +10,12 @@ __version__ = '2.15.2post1'
 
 
 class Jit(SchemaJit):
+    # Marshmallow reads these on every call to `dump`/`load`.  They're compiled
+    # eagerly in `__init__` and stored as plain instance attributes so the
+    # per-call lookup is a dictionary hit rather than a property invocation.
+    jitted_marshal_method = None
+    jitted_unmarshal_method = None
+
     def __init__(self, schema):
         super(Jit, self).__init__(schema)
         self.schema = schema
@@ -17,11 +23,5 @@ class Jit(SchemaJit):
             schema, context=JitContext())
         self.unmarshal_method = generate_unmarshall_method(
             schema, context=JitContext())
-
-    @property
-    def jitted_marshal_method(self):
-        return self.marshal_method
-
-    @property
-    def jitted_unmarshal_method(self):
-        return self.unmarshal_method
+        self.jitted_marshal_method = self.marshal_method
+        self.jitted_unmarshal_method = self.unmarshal_method
@@ -2,14 +2,23 @@ import sys
 
 if False:  # pylint: disable=using-constant-test
     # pylint: disable=unused-import
-    from types import MethodType
+    from types import CodeType, MethodType
 
 
 if sys.version_info[0] >= 3:
     def is_overridden(instance_func, class_func):
         # type: (MethodType, MethodType) -> bool
         return instance_func.__func__ is not class_func
+
+    def compile_optimized(source, filename):
+        # type: (str, str) -> CodeType
+        return compile(source, filename, 'exec', optimize=2)
 else:
     def is_overridden(instance_func, class_func):
         # type: (MethodType, MethodType) -> bool
         return instance_func.__func__ is not class_func.__func__
+
+    def compile_optimized(source, filename):
+        # type: (str, str) -> CodeType
+        # Python 2 only supports setting the optimization level globally.
+        return compile(source, filename, 'exec')
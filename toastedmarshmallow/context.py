@@ -0,0 +1,18 @@
+import attr
+
+if False:  # pylint: disable=using-constant-test
+    # pylint: disable=unused-import
+    from typing import Any, Dict, Optional, Set
+
+
+@attr.s(slots=True)
+class JitContext(object):
+    """ Bag of properties to keep track of the context of what's being jitted.
+
+    """
+    namespace = attr.ib(default=attr.Factory(dict))  # type: Dict[str, Any]
+    use_inliners = attr.ib(default=True)  # type: bool
+    schema_stack = attr.ib(default=attr.Factory(set))  # type: Set[str]
+    only = attr.ib(default=None)  # type: Optional[Set[str]]
+    exclude = attr.ib(default=attr.Factory(set))  # type: Set[str]
+    is_serializing = attr.ib(default=True)  # type: bool
@@ -0,0 +1,226 @@
+import weakref
+from abc import ABCMeta, abstractmethod
+
+from six import add_metaclass, text_type, string_types
+from marshmallow import fields
+
+from .compat import is_overridden
+from .utils import field_symbol_name
+
+if False:  # pylint: disable=using-constant-test
+    # pylint: disable=unused-import
+    from typing import Any, Dict, MutableMapping, Optional
+    from .context import JitContext
+
+
+@add_metaclass(ABCMeta)
+class FieldInliner(object):
+    """Base class for generating code to serialize a field.
+
+    Inliners are used to generate the code to validate/parse fields without
+    having to bounce back into the underlying marshmallow code.  While this is
+    somewhat fragile as it requires the inliners to be kept in sync with the
+    underlying implementation, it's good for a >2X speedup on benchmarks.
+    """
+    @abstractmethod
+    def inline(self, field, context):
+        # type: (fields.Field, JitContext) -> Optional[str]
+        pass  # pragma: no cover
+
+
+def _exact_type_template(type_name, template):
+    # type: (str, str) -> str
+    """Wraps an inliner template so values that are exactly of the type the
+    template converts to are used as is.
+
+    `type(value) is int` is a pointer comparison, which is cheaper than
+    calling the type on a value that already has it.
+    """
+    return '{0} if type({0}) is ' + type_name + ' else (' + template + ')'
+
+
+class StringInliner(FieldInliner):
+    # The templates don't depend on the field, so they're only built once.
+    CONVERT_TEMPLATE = (text_type.__name__ +
+                        '({0}) if {0} is not None else None')
+    SERIALIZE_TEMPLATE = _exact_type_template(text_type.__name__,
+                                              CONVERT_TEMPLATE)
+    DESERIALIZE_TEMPLATE = _exact_type_template(
+        text_type.__name__,
+        '(' + CONVERT_TEMPLATE + ') if '
+        '(isinstance({0}, (' + ','.join([x.__name__ for x in string_types]) +
+        ')) or {0} is None) else dict()["error"]')
+
+    def inline(self, field, context):
+        # type: (fields.Field, JitContext) -> Optional[str]
+        """Generates a template for inlining string serialization.
+
+        For example, generates
+
+        value if type(value) is unicode else (
+            unicode(value) if value is not None else None)
+
+        to serialize a string in Python 2.7
+        """
+        if is_overridden(field._serialize, fields.String._serialize):
+            return None
+        if context.is_serializing:
+            return self.SERIALIZE_TEMPLATE
+        return self.DESERIALIZE_TEMPLATE
+
+
+def _as_frozenset(values):
+    # type: (Any) -> Any
+    """Converts `values` into a `frozenset` so membership tests are constant
+    time, if the values are hashable.
+    """
+    try:
+        return frozenset(values)
+    except TypeError:
+        return values
+
+
+class BooleanInliner(FieldInliner):
+    def inline(self, field, context):
+        # type: (fields.Field, JitContext) -> Optional[str]
+        """Generates a template for inlining boolean serialization.
+
+        For example, generates:
+
+        (
+            (value in _field_some_field__truthy) or
+            (False if value in _field_some_field__falsy else bool(value))
+        )
+
+        This is somewhat fragile but it tracks what Marshmallow does.
+        """
+        if is_overridden(field._serialize, fields.Boolean._serialize):
+            return None
+        field_symbol = field_symbol_name(field.name)
+        truthy_symbol = '{0}__truthy'.format(field_symbol)
+        falsy_symbol = '{0}__falsy'.format(field_symbol)
+        context.namespace[truthy_symbol] = _as_frozenset(field.truthy)
+        context.namespace[falsy_symbol] = _as_frozenset(field.falsy)
+        result = ('(({0} in ' + truthy_symbol +
+                  ') or (False if {0} in ' + falsy_symbol +
+                  ' else dict()["error"]))')
+        result += ' if {0} is not None else None'
+        if context.is_serializing:
+            # Booleans always serialize to themselves.  This doesn't hold
+            # when deserializing, a custom `truthy` may reject `True`.
+            result = '{0} if {0} is True or {0} is False else (' + result + ')'
+        return result
+
+
+class NumberInliner(FieldInliner):
+    def inline(self, field, context):
+        # type: (fields.Field, JitContext) -> Optional[str]
+        """Generates a template for inlining string serialization.
+
+        For example, generates "float(value) if value is not None else None"
+        to serialize a float.  If `field.as_string` is `True` the result will
+        be coerced to a string if not None.
+        """
+        if (is_overridden(field._validated, fields.Number._validated) or
+                is_overridden(field._serialize, fields.Number._serialize) or
+                field.num_type not in (int, float)):
+            return None
+        result = field.num_type.__name__ + '({0})'
+        if field.as_string and context.is_serializing:
+            result = 'str({0})'.format(result)
+        if field.allow_none is True or context.is_serializing:
+            # Only emit the Null checking code if nulls are allowed.  If they
+            # aren't allowed casting `None` to an integer will throw and the
+            # slow path will take over.
+            result += ' if {0} is not None else None'
+        if not (field.as_string and context.is_serializing):
+            result = _exact_type_template(field.num_type.__name__, result)
+        return result
+
+
+class RawInliner(FieldInliner):
+    def inline(self, field, context):
+        # type: (fields.Field, JitContext) -> Optional[str]
+        """Generates a template for inlining raw fields, which pass values
+        through untouched in both directions.
+        """
+        if (is_overridden(field._serialize, fields.Field._serialize) or
+                is_overridden(field._deserialize, fields.Field._deserialize)):
+            return None
+        return '{0}'
+
+
+class ListInliner(FieldInliner):
+    def inline(self, field, context):
+        # type: (fields.Field, JitContext) -> Optional[str]
+        """Generates a template for inlining the serialization of lists whose
+        elements can be inlined.
+
+        For example, generates:
+
+        ([int(_x) for _x in value]
+         if type(value) is list or type(value) is tuple
+         else dict()["error"]) if value is not None else None
+
+        Other collections are left to the slow path since marshmallow wraps
+        non collection values in a list.  Deserialization isn't inlined as
+        it has to validate each element individually.
+        """
+        if (not context.is_serializing or
+                is_overridden(field._serialize, fields.List._serialize) or
+                isinstance(field.container, fields.List) or
+                field.container.attribute):
+            return None
+        container_inliner = inliner_for_field(context, field.container)
+        if container_inliner is None:
+            return None
+        element = container_inliner.format('_x')
+        element = element.replace('{', '{{').replace('}', '}}')
+        return ('([' + element + ' for _x in {0}] '
+                'if type({0}) is list or type({0}) is tuple '
+                'else dict()["error"]) if {0} is not None else None')
+
+
+INLINERS = {
+    fields.String: StringInliner(),
+    fields.Number: NumberInliner(),
+    fields.Boolean: BooleanInliner(),
+    fields.Raw: RawInliner(),
+    fields.List: ListInliner(),
+}
+
+# Cache of the inliner resolved from `INLINERS` for each concrete field class.
+_INLINER_CACHE = weakref.WeakKeyDictionary()  # type: MutableMapping[type, Optional[FieldInliner]]
+
+# Copy of the contents of `INLINERS` that `_INLINER_CACHE` was filled from.
+_INLINER_CACHE_SOURCE = {}  # type: Dict[type, FieldInliner]
+
+
+def _inliner_for_field_class(field_class):
+    # type: (type) -> Optional[FieldInliner]
+    """Gets the inliner registered in `INLINERS` for the closest class in the
+    MRO of `field_class`.
+    """
+    if INLINERS != _INLINER_CACHE_SOURCE:
+        # Inliners were registered or removed since the cache was filled.
+        _INLINER_CACHE.clear()
+        _INLINER_CACHE_SOURCE.clear()
+        _INLINER_CACHE_SOURCE.update(INLINERS)
+    if field_class in _INLINER_CACHE:
+        return _INLINER_CACHE[field_class]
+    inliner = None
+    for base_class in field_class.__mro__:
+        inliner = INLINERS.get(base_class)
+        if inliner is not None:
+            break
+    _INLINER_CACHE[field_class] = inliner
+    return inliner
+
+
+def inliner_for_field(context, field_obj):
+    # type: (JitContext, fields.Field) -> Optional[str]
+    if context.use_inliners:
+        inliner = _inliner_for_field_class(type(field_obj))
+        if inliner is not None:
+            return inliner.inline(field_obj, context)
+    return None
@@ -1,266 +1,56 @@
-import base64
-import keyword
 import re
-from abc import ABCMeta, abstractmethod
-from collections import Mapping
+from collections import Mapping, OrderedDict
 
 import attr
-from six import exec_, iteritems, add_metaclass, text_type, string_types
+from six import exec_, text_type, string_types
 from marshmallow import missing, Schema, fields
 from marshmallow.base import SchemaABC
 
-from .compat import is_overridden
-from .utils import IndentedString
-
-
-# Regular Expression for identifying a valid Python identifier name.
-_VALID_IDENTIFIER = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')
+from .compat import compile_optimized, is_overridden
+from .context import JitContext
+from .inliners import FieldInliner, inliner_for_field
+from .serializers import (
+    ALL_SERIALIZER_CLASSES,
+    EXPECTED_TYPE_TO_CLASS,
+    DictSerializer,
+    HybridSerializer,
+    InstanceSerializer
+)
+from .utils import _VALID_IDENTIFIER, IndentedString, field_symbol_name
+
+
+# Regular Expression for finding the identifiers referenced in generated code.
+_IDENTIFIER = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*')
+
+# Builtins used by the generated code for every field transformed.
+_BOUND_BUILTINS = frozenset(
+    ['callable', 'float', 'int', 'isinstance', 'list', 'tuple', 'type',
+     text_type.__name__] +
+    [x.__name__ for x in string_types])
+
+# The maximum number of symbols bound as default arguments of a generated
+# method.  Python < 3.7 doesn't compile functions with more than 255 arguments,
+# one of which is the object (or objects) being transformed.
+_MAX_BOUND_SYMBOLS = 254
 
 if False:  # pylint: disable=using-constant-test
     # pylint: disable=unused-import
-    from typing import Any, Callable, Dict, Optional, Tuple, Union, Set
-
-
-def field_symbol_name(field_name):
-    # type: (str) -> str
-    """Generates the symbol name to be used when accessing a field in generated
-    code.
-
-    If the field name isn't a valid identifier name, synthesizes a name by
-    base64 encoding the fieldname.
-    """
-    if not _VALID_IDENTIFIER.match(field_name):
-        field_name = str(base64.b64encode(
-            field_name.encode('utf-8')).decode('utf-8').strip('='))
-    return '_field_{field_name}'.format(field_name=field_name)
-
-
-def attr_str(attr_name):
-    # type: (str) -> str
-    """Gets the string to use when accessing an attribute on an object.
-
-    Handles case where the attribute name collides with a keyword and would
-    therefore be illegal to access with dot notation.
-    """
-    if keyword.iskeyword(attr_name):
-        return 'getattr(obj, "{0}")'.format(attr_name)
-    return 'obj.{0}'.format(attr_name)
-
-
-@add_metaclass(ABCMeta)
-class FieldSerializer(object):
-    """Base class for generating code to serialize a field.
-    """
-    def __init__(self, context=None):
-        # type: (JitContext) -> None
-        """
-        :param context: The context for the current Jit
-        """
-        self.context = context or JitContext()
-
-    @abstractmethod
-    def serialize(self, attr_name, field_symbol,
-                  assignment_template, field_obj):
-        # type: (str, str, str, fields.Field) -> IndentedString
-        """Generates the code to pull a field off of an object into the result.
-
-        :param attr_name: The name of the attribute being accessed/
-        :param field_symbol: The symbol to use when accessing the field.  Should
-            be generated via field_symbol_name.
-        :param assignment_template: A string template to use when generating
-            code.  The assignment template is passed into the serializer and
-            has a single possitional placeholder for string formatting.  An
-            example of a value that may be passed into assignment_template is:
-            `res['some_field'] = {0}`
-        :param field_obj: The instance of the Marshmallow field being
-            serialized.
-        :return: The code to pull a field off of the object passed in.
-        """
-        pass  # pragma: no cover
-
-
-class InstanceSerializer(FieldSerializer):
-    """Generates code for accessing fields as if they were instance variables.
-
-    For example, generates:
-
-    res['some_value'] = obj.some_value
-    """
-    def serialize(self, attr_name, field_symbol,
-                  assignment_template, field_obj):
-        # type: (str, str, str, fields.Field) -> IndentedString
-        return IndentedString(assignment_template.format(attr_str(attr_name)))
-
-
-class DictSerializer(FieldSerializer):
-    """Generates code for accessing fields as if they were a dict, generating
-    the proper code for handing missing fields as well.  For example, generates:
-
-    # Required field with no default
-    res['some_value'] = obj['some_value']
-
-    # Field with a default.  some_value__default will be injected at exec time.
-    res['some_value'] = obj.get('some_value', some_value__default)
-
-    # Non required field:
-    if 'some_value' in obj:
-        res['some_value'] = obj['some_value']
-    """
-    def serialize(self, attr_name, field_symbol,
-                  assignment_template, field_obj):
-        # type: (str, str, str, fields.Field) -> IndentedString
-        body = IndentedString()
-        if self.context.is_serializing:
-            default_str = 'default'
-            default_value = field_obj.default
-        else:
-            default_str = 'missing'
-            default_value = field_obj.missing
-            if field_obj.required:
-                body += assignment_template.format('obj["{attr_name}"]'.format(
-                    attr_name=attr_name))
-                return body
-        if default_value == missing:
-            body += 'if "{attr_name}" in obj:'.format(attr_name=attr_name)
-            with body.indent():
-                body += assignment_template.format('obj["{attr_name}"]'.format(
-                    attr_name=attr_name))
-        else:
-            if callable(default_value):
-                default_str += '()'
-
-            body += assignment_template.format(
-                'obj.get("{attr_name}", {field_symbol}__{default_str})'.format(
-                    attr_name=attr_name, field_symbol=field_symbol,
-                    default_str=default_str))
-        return body
-
+    from types import CodeType
+    from typing import (Any, Callable, Dict, List, Optional, Sequence, Tuple,
+                        Type, Union)
+    from .serializers import FieldSerializer
 
-class HybridSerializer(FieldSerializer):
-    """Generates code for accessing fields as if they were a hybrid object.
 
-    Hybrid objects are objects that don't inherit from `Mapping`, but do
-    implement `__getitem__`.  This means we first have to attempt a lookup by
-    key, then fall back to looking up by instance variable.
+def generate_field_symbols(schema):
+    # type: (Schema) -> Dict[str, str]
+    """Generates the symbol names for every field of a schema, keyed by field
+    name.
 
-    For example, generates:
-
-    try:
-        value = obj['some_value']
-    except (KeyError, AttributeError, IndexError, TypeError):
-        value = obj.some_value
-    res['some_value'] = value
+    This is computed once per schema and shared between all of the generated
+    methods rather than regenerating the symbols for each of them.
     """
-    def serialize(self, attr_name, field_symbol,
-                  assignment_template, field_obj):
-        # type: (str, str, str, fields.Field) -> IndentedString
-        body = IndentedString()
-        body += 'try:'
-        with body.indent():
-            body += 'value = obj["{attr_name}"]'.format(attr_name=attr_name)
-        body += 'except (KeyError, AttributeError, IndexError, TypeError):'
-        with body.indent():
-            body += 'value = {attr_str}'.format(attr_str=attr_str(attr_name))
-        body += assignment_template.format('value')
-        return body
-
-
-@attr.s
-class JitContext(object):
-    """ Bag of properties to keep track of the context of what's being jitted.
-
-    """
-    namespace = attr.ib(default={})  # type: Dict[str, Any]
-    use_inliners = attr.ib(default=True)  # type: bool
-    schema_stack = attr.ib(default=attr.Factory(set))  # type: Set[str]
-    only = attr.ib(default=None)  # type: Optional[Set[str]]
-    exclude = attr.ib(default=set())  # type: Set[str]
-    is_serializing = attr.ib(default=True)  # type: bool
-
-
-@add_metaclass(ABCMeta)
-class FieldInliner(object):
-    """Base class for generating code to serialize a field.
-
-    Inliners are used to generate the code to validate/parse fields without
-    having to bounce back into the underlying marshmallow code.  While this is
-    somewhat fragile as it requires the inliners to be kept in sync with the
-    underlying implementation, it's good for a >2X speedup on benchmarks.
-    """
-    @abstractmethod
-    def inline(self, field, context):
-        # type: (fields.Field, JitContext) -> Optional[str]
-        pass  # pragma: no cover
-
-
-class StringInliner(FieldInliner):
-    def inline(self, field, context):
-        # type: (fields.Field, JitContext) -> Optional[str]
-        """Generates a template for inlining string serialization.
-
-        For example, generates "unicode(value) if value is not None else None"
-        to serialize a string in Python 2.7
-        """
-        if is_overridden(field._serialize, fields.String._serialize):
-            return None
-        result = text_type.__name__ + '({0})'
-        result += ' if {0} is not None else None'
-        if not context.is_serializing:
-            string_type_strings = ','.join([x.__name__ for x in string_types])
-            result = ('(' + result + ') if '
-                      '(isinstance({0}, (' + string_type_strings +
-                      ')) or {0} is None) else dict()["error"]')
-        return result
-
-
-class BooleanInliner(FieldInliner):
-    def inline(self, field, context):
-        # type: (fields.Field, JitContext) -> Optional[str]
-        """Generates a template for inlining boolean serialization.
-
-        For example, generates:
-
-        (
-            (value in __some_field_truthy) or
-            (False if value in __some_field_falsy else bool(value))
-        )
-
-        This is somewhat fragile but it tracks what Marshmallow does.
-        """
-        if is_overridden(field._serialize, fields.Boolean._serialize):
-            return None
-        truthy_symbol = '__{0}_truthy'.format(field.name)
-        falsy_symbol = '__{0}_falsy'.format(field.name)
-        context.namespace[truthy_symbol] = field.truthy
-        context.namespace[falsy_symbol] = field.falsy
-        result = ('(({0} in ' + truthy_symbol +
-                  ') or (False if {0} in ' + falsy_symbol +
-                  ' else dict()["error"]))')
-        return result + ' if {0} is not None else None'
-
-
-class NumberInliner(FieldInliner):
-    def inline(self, field, context):
-        # type: (fields.Field, JitContext) -> Optional[str]
-        """Generates a template for inlining string serialization.
-
-        For example, generates "float(value) if value is not None else None"
-        to serialize a float.  If `field.as_string` is `True` the result will
-        be coerced to a string if not None.
-        """
-        if (is_overridden(field._validated, fields.Number._validated) or
-                is_overridden(field._serialize, fields.Number._serialize) or
-                field.num_type not in (int, float)):
-            return None
-        result = field.num_type.__name__ + '({0})'
-        if field.as_string and context.is_serializing:
-            result = 'str({0})'.format(result)
-        if field.allow_none is True or context.is_serializing:
-            # Only emit the Null checking code if nulls are allowed.  If they
-            # aren't allowed casting `None` to an integer will throw and the
-            # slow path will take over.
-            result += ' if {0} is not None else None'
-        return result
+    return {field_name: field_symbol_name(field_name)
+            for field_name in schema.fields}
 
 
 class NestedInliner(FieldInliner):  # pragma: no cover
@@ -323,19 +113,6 @@ class NestedInliner(FieldInliner):  # pragma: no cover
         return method_name + '({0}) if {0} is not None else None'
 
 
-INLINERS = {
-    fields.String: StringInliner(),
-    fields.Number: NumberInliner(),
-    fields.Boolean: BooleanInliner(),
-}
-
-EXPECTED_TYPE_TO_CLASS = {
-    'object': InstanceSerializer,
-    'dict': DictSerializer,
-    'hybrid': HybridSerializer
-}
-
-
 def _should_skip_field(field_name, field_obj, context):
     # type: (str, fields.Field, JitContext) -> bool
     load_only = getattr(field_obj, 'load_only', False)
@@ -364,144 +141,293 @@ def _should_skip_field(field_name, field_obj, context):
     return False
 
 
-def generate_transform_method_body(schema, on_field, context):
-    # type: (Schema, FieldSerializer, JitContext) -> IndentedString
+@attr.s(slots=True)
+class FieldPlan(object):
+    """The decisions about how to transform a field that don't depend on the
+    `FieldSerializer` being used.
+    """
+    field_name = attr.ib()  # type: str
+    field_obj = attr.ib()  # type: fields.Field
+    # The name of the attribute to pull off the incoming object.
+    attr_name = attr.ib()  # type: str
+    # Whether `attr_name` can be accessed as an attribute, rather than only
+    # by key.
+    attr_is_identifier = attr.ib()  # type: bool
+    # The key of the field in the result dictionary.
+    result_key = attr.ib()  # type: str
+    field_symbol = attr.ib()  # type: str
+    # The template generated by the field's inliner, if it can be inlined.
+    inliner = attr.ib()  # type: Optional[str]
+
+
+def generate_field_plans(schema, context, field_symbols=None):
+    # type: (Schema, JitContext, Optional[Dict[str, str]]) -> List[FieldPlan]
+    """Generates the plan for every field of a schema that is transformed in
+    the given context.
+
+    This is computed once per schema and shared between all of the generated
+    methods, so inliners (which may jit nested schemas) only run once for
+    each field.
+
+    :param field_symbols: The symbol of every field in the schema, as
+        generated by `generate_field_symbols`.  Computed if not passed in.
+    """
+    if field_symbols is None:
+        field_symbols = generate_field_symbols(schema)
+    plans = []  # type: List[FieldPlan]
+    for field_name, field_obj in schema.fields.items():
+        if _should_skip_field(field_name, field_obj, context):
+            continue
+
+        attr_name, destination = _get_attr_and_destination(context,
+                                                           field_name,
+                                                           field_obj)
+        plans.append(FieldPlan(
+            field_name=field_name,
+            field_obj=field_obj,
+            attr_name=attr_name,
+            attr_is_identifier=bool(_VALID_IDENTIFIER.match(attr_name)),
+            result_key=''.join([schema.prefix or '', destination]),
+            field_symbol=field_symbols[field_name],
+            inliner=inliner_for_field(context, field_obj)))
+    return plans
+
+
+def generate_transform_method_body(schema, on_field, context, many=False,
+                                   field_plans=None):
+    # type: (Schema, FieldSerializer, JitContext, bool, Optional[List[FieldPlan]]) -> IndentedString
     """Generates the method body for a schema and a given field serialization
     strategy.
+
+    :param many: Whether to generate a method that transforms a collection of
+        objects in a single loop rather than a single object.
+    :param field_plans: The plans of the fields to transform, as generated by
+        `generate_field_plans`.  Computed if not passed in.
     """
+    if field_plans is None:
+        field_plans = generate_field_plans(schema, context)
+    row = _generate_transform_row(schema, on_field, context, field_plans)
+    return _generate_transform_method(on_field.__class__.__name__, row, many)
+
+
+def _generate_transform_method(method_name, row, many, bound_symbols=()):
+    # type: (str, IndentedString, bool, Sequence[str]) -> IndentedString
+    """Wraps the code transforming a single object in a method.
+
+    :param bound_symbols: Global symbols to bind as default arguments of the
+        method, see `_generate_bound_symbols`.
+    """
+    arguments = ''.join(', {0}={0}'.format(symbol) for symbol in bound_symbols)
     body = IndentedString()
-    body += 'def {method_name}(obj):'.format(
-        method_name=on_field.__class__.__name__)
-    with body.indent():
-        if schema.dict_class is dict:
-            # Declaring dictionaries via `{}` is faster than `dict()` since it
-            # avoids the global lookup.
-            body += 'res = {}'
+    if many:
+        body += 'def {method_name}(objs{arguments}):'.format(
+            method_name=many_method_name(method_name), arguments=arguments)
+        with body.indent():
+            body += 'results = []'
+            # Avoids looking up (and binding) `append` for every object.
+            body += '__results_append = results.append'
+            body += 'for obj in objs:'
+            with body.indent():
+                body += row
+                body += '__results_append(res)'
+            body += 'return results'
+    else:
+        body += 'def {method_name}(obj{arguments}):'.format(
+            method_name=method_name, arguments=arguments)
+        with body.indent():
+            body += row
+            body += 'return res'
+    return body
+
+
+def _generate_bound_symbols(row, namespace):
+    # type: (IndentedString, Dict[str, Any]) -> List[str]
+    """Gets the global symbols referenced by `row` that are worth binding as
+    default arguments of the generated methods.
+
+    Default arguments are accessed as locals (`LOAD_FAST`) rather than through
+    a lookup in the globals, and then the builtins, for every field of every
+    object transformed.  Identifiers that merely look like symbols (such as
+    attribute names) are harmless, they just bind an unused argument.
+    """
+    identifiers = set(_IDENTIFIER.findall(str(row)))
+    builtins = [x for x in identifiers if x in _BOUND_BUILTINS]
+    symbols = sorted(x for x in identifiers
+                     if x in namespace and x not in _BOUND_BUILTINS)
+    # Builtins are used by most fields, so they're bound first.  Any symbols
+    # past the limit are left to be looked up in the globals.
+    limit = max(_MAX_BOUND_SYMBOLS - len(builtins), 0)
+    return sorted(builtins + symbols[:limit])
+
+
+def many_method_name(method_name):
+    # type: (str) -> str
+    """Gets the name of the generated method transforming a collection of
+    objects for the generated method named `method_name`.
+    """
+    return '{0}Many'.format(method_name)
+
+
+def _generate_transform_row(schema, on_field, context, field_plans):
+    # type: (Schema, FieldSerializer, JitContext, List[FieldPlan]) -> IndentedString
+    """Generates the code transforming a single object, `obj`, into `res`."""
+    # When serializing into a plain dictionary, the leading fields that are
+    # always assigned are stored in locals and `res` is created with a single
+    # dict display of them, avoiding a dictionary store (and resize) per
+    # field.  Only the fields before the first conditional one are, so that
+    # fields are still evaluated, and keys inserted, in the schema's order.
+    # Ordered dictionaries can't be built this way since dict displays don't
+    # preserve order everywhere.
+    use_dict_display = context.is_serializing and schema.dict_class is dict
+    unconditional_body = IndentedString()
+    unconditional_items = []  # type: List[Tuple[str, str]]
+    body = IndentedString()
+    # Whether the generated code checks for `None` results with `__res_get`.
+    uses_res_get = False
+    # Whether the generated code looks fields up with `__obj_get`.
+    uses_obj_get = False
+
+    # If we have to assume any field can be callable we always have to
+    # check to see if we need to invoke the method first.
+    # We can investigate tracing this as well.
+    jit_options = getattr(schema.opts, 'jit_options', {})
+    no_callable_fields = (jit_options.get('no_callable_fields') or
+                          not context.is_serializing)
+
+    for plan in field_plans:
+        field_obj = plan.field_obj
+        attr_name = plan.attr_name
+        result_key = plan.result_key
+        field_symbol = plan.field_symbol
+        inliner = plan.inliner
+
+        assignment_template = ''
+        value_key = '{0}'
+
+        serializer = on_field
+        if not plan.attr_is_identifier:
+            # If attr_name is not a valid python identifier, it can only
+            # be accessed via key lookups.
+            serializer = DictSerializer(context)
+
+        target = 'res["{key}"]'.format(key=result_key)
+        field_body = body
+        use_dict_display = (use_dict_display and field_obj._CHECK_ATTRIBUTE and
+                            serializer.assigns_unconditionally(field_obj))
+        if use_dict_display:
+            target = '{field_symbol}__value'.format(field_symbol=field_symbol)
+            unconditional_items.append((result_key, target))
+            field_body = unconditional_body
+
+        if not no_callable_fields:
+            assignment_template = (
+                'value = {0}; '
+                'value = value() if callable(value) else value; ')
+            value_key = 'value'
+
+        if inliner:
+            assignment_template += _generate_inlined_access_template(
+                inliner, target, no_callable_fields)
+
         else:
-            # dict_class will be injected before `exec` is called.
-            body += 'res = dict_class()'
+            assignment_template += _generate_fallback_access_template(
+                context, plan, target, value_key)
+        if not field_obj._CHECK_ATTRIBUTE:
+            # fields like 'Method' expect to have `None` passed in when
+            # invoking their _serialize method.
+            body += assignment_template.format('None')
+            context.namespace['__marshmallow_missing'] = missing
+            body += 'if res["{key}"] is __marshmallow_missing:'.format(
+                key=result_key)
+            with body.indent():
+                body += 'del res["{key}"]'.format(key=result_key)
+
+        else:
+            if isinstance(serializer, DictSerializer):
+                uses_obj_get = (uses_obj_get or
+                                serializer.uses_get(field_obj))
+            field_body += serializer.serialize(
+                attr_name, field_symbol, assignment_template, field_obj)
+
+            if not context.is_serializing and field_obj.load_from:
+                # Marshmallow has a somewhat counter intuitive behavior.
+                # It will first load from the name of the field, then,
+                # should that fail, will load from the field specified in
+                # 'load_from'.
+                #
+                # For example:
+                #
+                # class TestSchema(Schema):
+                #     foo = StringField(load_from='bar')
+                # TestSchema().load({'foo': 'haha'}).result
+                #
+                # Works just fine with no errors.
+                #
+                # class TestSchema(Schema):
+                #     foo = StringField(load_from='bar')
+                # TestSchema().load({'foo': 'haha', 'bar': 'value'}).result
+                #
+                # Results in {'foo': 'haha'}
+                #
+                # Therefore, we generate code to mimic this behavior in
+                # cases where `load_from` is specified.
+                body += 'if "{key}" not in res:'.format(key=result_key)
+                with body.indent():
+                    body += serializer.serialize(
+                        field_obj.load_from, field_symbol,
+                        assignment_template, field_obj)
         if not context.is_serializing:
-            body += '__res_get = res.get'
-        for field_name, field_obj in iteritems(schema.fields):
-            if _should_skip_field(field_name, field_obj, context):
-                continue
-
-            attr_name, destination = _get_attr_and_destination(context,
-                                                               field_name,
-                                                               field_obj)
-
-            result_key = ''.join(
-                [schema.prefix or '', destination])
-
-            field_symbol = field_symbol_name(field_name)
-            assignment_template = ''
-            value_key = '{0}'
-
-            # If we have to assume any field can be callable we always have to
-            # check to see if we need to invoke the method first.
-            # We can investigate tracing this as well.
-            jit_options = getattr(schema.opts, 'jit_options', {})
-            no_callable_fields = (jit_options.get('no_callable_fields') or
-                                  not context.is_serializing)
-            if not no_callable_fields:
-                assignment_template = (
-                    'value = {0}; '
-                    'value = value() if callable(value) else value; ')
-                value_key = 'value'
-
-            # Attempt to see if this field type can be inlined.
-            inliner = inliner_for_field(context, field_obj)
-
-            if inliner:
-                assignment_template += _generate_inlined_access_template(
-                    inliner, result_key, no_callable_fields)
-
-            else:
-                assignment_template += _generate_fallback_access_template(
-                    context, field_name, field_obj, result_key, value_key)
-            if not field_obj._CHECK_ATTRIBUTE:
-                # fields like 'Method' expect to have `None` passed in when
-                # invoking their _serialize method.
-                body += assignment_template.format('None')
-                context.namespace['__marshmallow_missing'] = missing
-                body += 'if res["{key}"] is __marshmallow_missing:'.format(
+            if field_obj.required:
+                body += 'if "{key}" not in res:'.format(key=result_key)
+                with body.indent():
+                    body += 'raise ValueError()'
+            if field_obj.allow_none is not True:
+                uses_res_get = True
+                body += 'if __res_get("{key}", res) is None:'.format(
                     key=result_key)
                 with body.indent():
-                    body += 'del res["{key}"]'.format(key=result_key)
-
-            else:
-                serializer = on_field
-                if not _VALID_IDENTIFIER.match(attr_name):
-                    # If attr_name is not a valid python identifier, it can only
-                    # be accessed via key lookups.
-                    serializer = DictSerializer(context)
-
-                body += serializer.serialize(
-                    attr_name, field_symbol, assignment_template, field_obj)
-
-                if not context.is_serializing and field_obj.load_from:
-                    # Marshmallow has a somewhat counter intuitive behavior.
-                    # It will first load from the name of the field, then,
-                    # should that fail, will load from the field specified in
-                    # 'load_from'.
-                    #
-                    # For example:
-                    #
-                    # class TestSchema(Schema):
-                    #     foo = StringField(load_from='bar')
-                    # TestSchema().load({'foo': 'haha'}).result
-                    #
-                    # Works just fine with no errors.
-                    #
-                    # class TestSchema(Schema):
-                    #     foo = StringField(load_from='bar')
-                    # TestSchema().load({'foo': 'haha', 'bar': 'value'}).result
-                    #
-                    # Results in {'foo': 'haha'}
-                    #
-                    # Therefore, we generate code to mimic this behavior in
-                    # cases where `load_from` is specified.
-                    body += 'if "{key}" not in res:'.format(key=result_key)
-                    with body.indent():
-                        body += serializer.serialize(
-                            field_obj.load_from, field_symbol,
-                            assignment_template, field_obj)
-            if not context.is_serializing:
-                if field_obj.required:
-                    body += 'if "{key}" not in res:'.format(key=result_key)
-                    with body.indent():
-                        body += 'raise ValueError()'
-                if field_obj.allow_none is not True:
-                    body += 'if __res_get("{key}", res) is None:'.format(
-                        key=result_key)
-                    with body.indent():
-                        body += 'raise ValueError()'
-                if (field_obj.validators or
-                        is_overridden(field_obj._validate,
-                                      fields.Field._validate)):
-                    body += 'if "{key}" in res:'.format(key=result_key)
-                    with body.indent():
-                        body += '{field_symbol}__validate(res["{result_key}"])'.format(
-                            field_symbol=field_symbol, result_key=result_key
-                        )
-
-        body += 'return res'
-    return body
+                    body += 'raise ValueError()'
+            if (field_obj.validators or
+                    is_overridden(field_obj._validate,
+                                  fields.Field._validate)):
+                body += 'if "{key}" in res:'.format(key=result_key)
+                with body.indent():
+                    body += '{field_symbol}__validate(res["{result_key}"])'.format(
+                        field_symbol=field_symbol, result_key=result_key
+                    )
+
+    row = IndentedString()
+    if uses_obj_get:
+        # Avoids looking up (and binding) `get` for every field with a default.
+        row += '__obj_get = obj.get'
+    row += unconditional_body
+    if schema.dict_class is dict:
+        # Declaring dictionaries via `{}` is faster than `dict()` since it
+        # avoids the global lookup.
+        row += 'res = {{{items}}}'.format(items=', '.join(
+            '"{key}": {value}'.format(key=key, value=value)
+            for key, value in unconditional_items))
+    else:
+        # dict_class will be injected before `exec` is called.
+        row += 'res = dict_class()'
+    if uses_res_get:
+        row += '__res_get = res.get'
+    row += body
+    return row
 
 
-def _generate_fallback_access_template(context, field_name, field_obj,
-                                       result_key, value_key):
-    field_symbol = field_symbol_name(field_name)
+def _generate_fallback_access_template(context, plan, target, value_key):
+    # type: (JitContext, FieldPlan, str, str) -> str
     transform_method_name = 'serialize'
     if not context.is_serializing:
         transform_method_name = 'deserialize'
-    key_name = field_name
+    key_name = plan.field_name
     if not context.is_serializing:
-        key_name = field_obj.load_from or field_name
+        key_name = plan.field_obj.load_from or plan.field_name
     return (
-        'res["{key}"] = {field_symbol}__{transform}('
+        '{target} = {field_symbol}__{transform}('
         '{value_key}, "{key_name}", obj)'.format(
-            key=result_key, field_symbol=field_symbol,
+            target=target, field_symbol=plan.field_symbol,
             transform=transform_method_name,
             key_name=key_name, value_key=value_key))
 
@@ -522,9 +448,11 @@ def _get_attr_and_destination(context, field_name, field_obj):
     return attr_name, destination
 
 
-def _generate_inlined_access_template(inliner, key, no_callable_fields):
+def _generate_inlined_access_template(inliner, target, no_callable_fields):
     # type: (str, str, bool) -> str
-    """Generates the code to access a field with an inliner."""
+    """Generates the code to access a field with an inliner, assigning the
+    result to `target`.
+    """
     value_key = 'value'
     assignment_template = ''
     if not no_callable_fields:
@@ -533,43 +461,56 @@ def _generate_inlined_access_template(inliner, key, no_callable_fields):
     else:
         assignment_template += 'value = {0}; '
         value_key = inliner.format('value')
-    assignment_template += 'res["{key}"] = {value_key}'.format(
-        key=key, value_key=value_key)
+    assignment_template += '{target} = {value_key}'.format(
+        target=target, value_key=value_key)
     return assignment_template
 
 
-def inliner_for_field(context, field_obj):
-    # type: (JitContext, fields.Field) -> Optional[str]
-    if context.use_inliners:
-        inliner = None
-        for field_type, inliner_class in iteritems(INLINERS):
-            if isinstance(field_obj, field_type):
-                inliner = inliner_class.inline(field_obj, context)
-                if inliner:
-                    break
-        return inliner
-    return None
-
-
-def generate_method_bodies(schema, context):
-    # type: (Schema, JitContext) -> str
-    """Generate 3 method bodies for marshalling objects, dictionaries, or hybrid
+def generate_method_bodies(
+        schema,  # type: Schema
+        context,  # type: JitContext
+        serializer_classes=None,  # type: Optional[Sequence[Type[FieldSerializer]]]
+        many=False,  # type: bool
+        field_plans=None  # type: Optional[List[FieldPlan]]
+):
+    # type: (...) -> str
+    """Generate method bodies for marshalling objects, dictionaries, or hybrid
     objects.
+
+    :param serializer_classes: The `FieldSerializer` classes to generate
+        methods for.  Defaults to all 3 of them.
+    :param many: Whether to additionally generate methods for marshalling
+        collections of objects, see `many_method_name`.
+    :param field_plans: The plans of the fields to transform, as generated by
+        `generate_field_plans`.  Computed if not passed in.
     """
+    if serializer_classes is None:
+        serializer_classes = ALL_SERIALIZER_CLASSES
+    if field_plans is None:
+        field_plans = generate_field_plans(schema, context)
     result = IndentedString()
 
-    result += generate_transform_method_body(schema,
-                                             InstanceSerializer(context),
-                                             context)
-    result += generate_transform_method_body(schema,
-                                             DictSerializer(context),
-                                             context)
-    result += generate_transform_method_body(schema,
-                                             HybridSerializer(context),
-                                             context)
+    for serializer_class in serializer_classes:
+        # The single and many methods share the code transforming an object.
+        row = _generate_transform_row(schema, serializer_class(context),
+                                      context, field_plans)
+        bound_symbols = _generate_bound_symbols(row, context.namespace)
+        result += _generate_transform_method(serializer_class.__name__, row,
+                                             many=False,
+                                             bound_symbols=bound_symbols)
+        if many:
+            result += _generate_transform_method(serializer_class.__name__,
+                                                 row, many=True,
+                                                 bound_symbols=bound_symbols)
     return str(result)
 
 
+# The maximum number of types `SerializeProxy` caches the serializer of.
+# Types created on the fly (e.g. by `namedtuple` factories) would otherwise be
+# kept alive, and the cache would grow, forever.
+_TYPE_CACHE_SIZE = 256
+
+
 class SerializeProxy(object):
     """Proxy object for calling serializer methods.
 
@@ -577,6 +518,12 @@ class SerializeProxy(object):
     of a specific type crosses `threshold` swaps out the implementation being
     used for the most specialized one available.
     """
+    # There's one proxy per jitted schema and `_call` is read on every call,
+    # so it's kept in a slot rather than an instance dictionary.
+    __slots__ = ('dict_serializer', 'hybrid_serializer', 'instance_serializer',
+                 'threshold', 'trace_count', '_traced_serializer',
+                 '_type_cache', '_call')
+
     def __init__(self, dict_serializer, hybrid_serializer,
                  instance_serializer,
                  threshold=100):
@@ -585,9 +532,13 @@ class SerializeProxy(object):
         self.hybrid_serializer = hybrid_serializer
         self.instance_serializer = instance_serializer
         self.threshold = threshold
-        self.dict_count = 0
-        self.hybrid_count = 0
-        self.instance_count = 0
+        # Number of calls traced so far.  While tracing, every call seen has
+        # been dispatched to the same serializer, `_traced_serializer`.
+        self.trace_count = 0
+        self._traced_serializer = None  # type: Optional[Callable]
+        # Maps the concrete type of objects seen to the serializer used for
+        # them, so the (slow) `Mapping` ABC check only happens once per type.
+        self._type_cache = {}  # type: Dict[type, Callable]
         self._call = self.tracing_call
 
         if not threshold:
@@ -596,42 +547,80 @@ class SerializeProxy(object):
     def __call__(self, obj):
         return self._call(obj)
 
+    def _serializer_for(self, obj_type):
+        # type: (type) -> Callable
+        """Determines the serializer to use for objects of type `obj_type`.
+
+        `__getitem__` is looked for in the class dictionaries of the MRO,
+        which avoids invoking (possibly expensive) `__getattr__` hooks on the
+        instance.  `getattr` on the type would also find `__getitem__` on a
+        metaclass, such as `EnumMeta`, which makes the class subscriptable
+        but not its instances.
+        """
+        if issubclass(obj_type, Mapping):
+            return self.dict_serializer
+        elif any('__getitem__' in vars(klass) for klass in obj_type.__mro__):
+            return self.hybrid_serializer
+        return self.instance_serializer
+
+    def _cached_serializer_for(self, obj_type):
+        # type: (type) -> Callable
+        serializer = self._type_cache.get(obj_type)
+        if serializer is None:
+            serializer = self._serializer_for(obj_type)
+            if len(self._type_cache) >= _TYPE_CACHE_SIZE:
+                self._type_cache.clear()
+            self._type_cache[obj_type] = serializer
+        return serializer
+
     def tracing_call(self, obj):
         # type: (Any) -> Any
         """Dispatcher which traces calls and specializes if possible.
         """
-        try:
-            if isinstance(obj, Mapping):
-                self.dict_count += 1
-                return self.dict_serializer(obj)
-            elif hasattr(obj, '__getitem__'):
-                self.hybrid_count += 1
-                return self.hybrid_serializer(obj)
-            self.instance_count += 1
-            return self.instance_serializer(obj)
-        finally:
-            non_zeros = [x for x in
-                         [self.dict_count,
-                          self.hybrid_count,
-                          self.instance_count] if x > 0]
-            if len(non_zeros) > 1:
-                self._call = self.no_tracing_call
-            elif self.dict_count >= self.threshold:
-                self._call = self.dict_serializer
-            elif self.hybrid_count >= self.threshold:
-                self._call = self.hybrid_serializer
-            elif self.instance_count >= self.threshold:
-                self._call = self.instance_serializer
+        serializer = self._cached_serializer_for(type(obj))
+        if self.trace_count and serializer is not self._traced_serializer:
+            # Objects requiring different serializers have been seen,
+            # there's nothing to specialize on.
+            self._call = self.no_tracing_call
+            return serializer(obj)
+        self._traced_serializer = serializer
+        self.trace_count += 1
+        if self.trace_count >= self.threshold:
+            self._call = serializer
+        return serializer(obj)
 
     def no_tracing_call(self, obj):
         # type: (Any) -> Any
         """Dispatcher with no tracing.
         """
-        if isinstance(obj, Mapping):
-            return self.dict_serializer(obj)
-        elif hasattr(obj, '__getitem__'):
-            return self.hybrid_serializer(obj)
-        return self.instance_serializer(obj)
+        return self._cached_serializer_for(type(obj))(obj)
+
+
+# The maximum number of code objects kept in `_CODE_CACHE`.
+_CODE_CACHE_SIZE = 1024
+
+# Least recently used cache of compiled generated source, keyed by the
+# filename and source.  Schemas of the same shape, typically instances of the
+# same Schema class, generate identical source so only the first of them needs
+# to compile it.
+_CODE_CACHE = OrderedDict()  # type: OrderedDict[Tuple[str, str], CodeType]
+
+
+def compile_generated_source(source, filename='<toastedmarshmallow>'):
+    # type: (str, str) -> CodeType
+    """Compiles generated source, reusing the code object from a previous
+    compilation of the same source if possible.
+
+    `filename` is what shows up in tracebacks through the generated code.
+    """
+    key = (filename, source)
+    code = _CODE_CACHE.pop(key, None)
+    if code is None:
+        code = compile_optimized(source, filename)
+        if len(_CODE_CACHE) >= _CODE_CACHE_SIZE:
+            _CODE_CACHE.popitem(last=False)
+    _CODE_CACHE[key] = code
+    return code
 
 
 def generate_marshall_method(schema, context=missing, threshold=100):
@@ -652,59 +641,88 @@ def generate_marshall_method(schema, context=missing, threshold=100):
         context = JitContext()
 
     context.namespace = {}
-    context.namespace['dict_class'] = lambda: schema.dict_class()  # pylint: disable=unnecessary-lambda
+    # Bind the class itself rather than a function looking it up on the
+    # schema to avoid an extra call for every object marshalled.
+    context.namespace['dict_class'] = schema.dict_class
 
     jit_options = getattr(schema.opts, 'jit_options', {})
 
-    context.schema_stack.add(schema.__class__)
-
-    result = generate_method_bodies(schema, context)
-
-    context.schema_stack.remove(schema.__class__)
+    if not context.is_serializing:
+        # Deserialization always expects a dictionary.
+        serializer_classes = [DictSerializer]  # type: Sequence[Type[FieldSerializer]]
+    elif jit_options.get('expected_marshal_type') in EXPECTED_TYPE_TO_CLASS:
+        serializer_classes = [EXPECTED_TYPE_TO_CLASS[
+            jit_options['expected_marshal_type']]]
+    else:
+        serializer_classes = ALL_SERIALIZER_CLASSES
 
+    # The namespace is populated before generating code so the generated
+    # methods can bind the symbols they use, see `_generate_bound_symbols`.
     namespace = context.namespace
+    field_symbols = generate_field_symbols(schema)
 
-    for key, value in iteritems(schema.fields):
+    for key, value in schema.fields.items():
         if value.attribute and '.' in value.attribute:
             # We're currently unable to handle dotted attributes.  These don't
             # seem to be widely used so punting for now.  For more information
             # see
             # https://github.com/marshmallow-code/marshmallow/issues/450
             return None
-        namespace[field_symbol_name(key) + '__serialize'] = value._serialize
-        namespace[field_symbol_name(key) + '__deserialize'] = value._deserialize
-        namespace[field_symbol_name(key) + '__validate_missing'] = value._validate_missing
-        namespace[field_symbol_name(key) + '__validate'] = value._validate
+        if _should_skip_field(key, value, context):
+            continue
+        # Only inject the symbols the generated code for this direction can
+        # reference, the rest would just bloat the globals of the methods.
+        field_symbol = field_symbols[key]
+        if context.is_serializing:
+            namespace[field_symbol + '__serialize'] = value._serialize
+            if value.default is not missing:
+                namespace[field_symbol + '__default'] = value.default
+        else:
+            namespace[field_symbol + '__deserialize'] = value._deserialize
+            namespace[field_symbol + '__validate'] = value._validate
+            if value.missing is not missing:
+                namespace[field_symbol + '__missing'] = value.missing
 
-        if value.default is not missing:
-            namespace[field_symbol_name(key) + '__default'] = value.default
-        if value.missing is not missing:
-            namespace[field_symbol_name(key) + '__missing'] = value.missing
+    context.schema_stack.add(schema.__class__)
 
-    exec_(result, namespace)
+    # Only generate the methods that can actually be invoked, there's no
+    # reason to pay for compiling methods that will never be called.  If
+    # there's only a single method collections can be marshalled in a single
+    # generated loop, otherwise each object has to go through the proxy.
+    field_plans = generate_field_plans(schema, context, field_symbols)
+    result = generate_method_bodies(schema, context, serializer_classes,
+                                    many=len(serializer_classes) == 1,
+                                    field_plans=field_plans)
 
-    proxy = None  # type: Optional[SerializeProxy]
-    marshall_method = None  # type: Union[SerializeProxy, Callable, None]
-    if not context.is_serializing:
-        # Deserialization always expects a dictionary.
-        marshall_method = namespace[DictSerializer.__name__]
-    elif jit_options.get('expected_marshal_type') in EXPECTED_TYPE_TO_CLASS:
-        marshall_method = namespace[EXPECTED_TYPE_TO_CLASS[
-            jit_options['expected_marshal_type']].__name__]
+    context.schema_stack.remove(schema.__class__)
+
+    filename = '<jit:{0}>'.format(schema.__class__.__name__)
+    exec_(compile_generated_source(result, filename), namespace)
+
+    if len(serializer_classes) == 1:
+        method_name = serializer_classes[0].__name__
+        marshall_method = namespace[method_name]
+        marshall_many_method = namespace[many_method_name(method_name)]
+
+        def marshall(obj, many=False):
+            if many:
+                return marshall_many_method(obj)
+            return marshall_method(obj)
     else:
-        marshall_method = SerializeProxy(
+        proxy = SerializeProxy(
             namespace[DictSerializer.__name__],
             namespace[HybridSerializer.__name__],
             namespace[InstanceSerializer.__name__],
             threshold=threshold)
-        proxy = marshall_method
 
-    def marshall(obj, many=False):
-        if many:
-            return [marshall_method(x) for x in obj]
-        return marshall_method(obj)
+        # Call the proxy's current dispatcher directly rather than through
+        # `SerializeProxy.__call__`, saving a Python level call per object.
+        # `_call` is looked up every time since tracing may swap it out.
+        def marshall(obj, many=False):
+            if many:
+                return [proxy._call(x) for x in obj]
+            return proxy._call(obj)
 
-    if proxy:
         # Used to allow tests to introspect the proxy.
         marshall.proxy = proxy  # type: ignore
     marshall._source = result  # type: ignore
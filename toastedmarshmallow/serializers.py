@@ -0,0 +1,185 @@
+import keyword
+from abc import ABCMeta, abstractmethod
+
+from six import add_metaclass
+from marshmallow import missing
+
+from .context import JitContext
+from .utils import IndentedString
+
+if False:  # pylint: disable=using-constant-test
+    # pylint: disable=unused-import
+    from typing import Dict, Sequence, Type
+    from marshmallow import fields
+
+
+# Python keywords, which can't be accessed as attributes with dot notation.
+_KEYWORDS = frozenset(keyword.kwlist)
+
+
+def attr_str(attr_name):
+    # type: (str) -> str
+    """Gets the string to use when accessing an attribute on an object.
+
+    Handles case where the attribute name collides with a keyword and would
+    therefore be illegal to access with dot notation.
+    """
+    if attr_name in _KEYWORDS:
+        return 'getattr(obj, "{0}")'.format(attr_name)
+    return 'obj.{0}'.format(attr_name)
+
+
+@add_metaclass(ABCMeta)
+class FieldSerializer(object):
+    """Base class for generating code to serialize a field.
+    """
+    def __init__(self, context=None):
+        # type: (JitContext) -> None
+        """
+        :param context: The context for the current Jit
+        """
+        self.context = context or JitContext()
+
+    @abstractmethod
+    def serialize(self, attr_name, field_symbol,
+                  assignment_template, field_obj):
+        # type: (str, str, str, fields.Field) -> IndentedString
+        """Generates the code to pull a field off of an object into the result.
+
+        :param attr_name: The name of the attribute being accessed/
+        :param field_symbol: The symbol to use when accessing the field.  Should
+            be generated via field_symbol_name.
+        :param assignment_template: A string template to use when generating
+            code.  The assignment template is passed into the serializer and
+            has a single possitional placeholder for string formatting.  An
+            example of a value that may be passed into assignment_template is:
+            `res['some_field'] = {0}`
+        :param field_obj: The instance of the Marshmallow field being
+            serialized.
+        :return: The code to pull a field off of the object passed in.
+        """
+        pass  # pragma: no cover
+
+    # Subclasses deciding based on the field and context override this.
+    def assigns_unconditionally(self, field_obj):  # pylint: disable=no-self-use
+        # type: (fields.Field) -> bool
+        """Whether the code generated by `serialize` always performs the
+        assignment, regardless of the object passed in.
+        """
+        del field_obj  # Unused by the default implementation.
+        return True
+
+
+class InstanceSerializer(FieldSerializer):
+    """Generates code for accessing fields as if they were instance variables.
+
+    For example, generates:
+
+    res['some_value'] = obj.some_value
+    """
+    def serialize(self, attr_name, field_symbol,
+                  assignment_template, field_obj):
+        # type: (str, str, str, fields.Field) -> IndentedString
+        return IndentedString(assignment_template.format(attr_str(attr_name)))
+
+
+class DictSerializer(FieldSerializer):
+    """Generates code for accessing fields as if they were a dict, generating
+    the proper code for handing missing fields as well.  For example, generates:
+
+    # Required field with no default
+    res['some_value'] = obj['some_value']
+
+    # Field with a default.  some_value__default will be injected at exec time
+    # and __obj_get is bound to obj.get once per object.
+    res['some_value'] = __obj_get('some_value', some_value__default)
+
+    # Non required field:
+    if 'some_value' in obj:
+        res['some_value'] = obj['some_value']
+    """
+    def serialize(self, attr_name, field_symbol,
+                  assignment_template, field_obj):
+        # type: (str, str, str, fields.Field) -> IndentedString
+        body = IndentedString()
+        if self.context.is_serializing:
+            default_str = 'default'
+            default_value = field_obj.default
+        else:
+            default_str = 'missing'
+            default_value = field_obj.missing
+            if field_obj.required:
+                body += assignment_template.format('obj["{attr_name}"]'.format(
+                    attr_name=attr_name))
+                return body
+        if default_value == missing:
+            body += 'if "{attr_name}" in obj:'.format(attr_name=attr_name)
+            with body.indent():
+                body += assignment_template.format('obj["{attr_name}"]'.format(
+                    attr_name=attr_name))
+        else:
+            if callable(default_value):
+                default_str += '()'
+
+            body += assignment_template.format(
+                '__obj_get("{attr_name}", {field_symbol}__{default_str})'.format(
+                    attr_name=attr_name, field_symbol=field_symbol,
+                    default_str=default_str))
+        return body
+
+    def assigns_unconditionally(self, field_obj):
+        # type: (fields.Field) -> bool
+        if self.context.is_serializing:
+            return field_obj.default != missing
+        return field_obj.required or field_obj.missing != missing
+
+    def uses_get(self, field_obj):
+        # type: (fields.Field) -> bool
+        """Whether the generated code for `field_obj` looks it up with
+        `__obj_get`, which has to be bound before the field is accessed.
+        """
+        if self.context.is_serializing:
+            return field_obj.default != missing
+        return not field_obj.required and field_obj.missing != missing
+
+
+class HybridSerializer(FieldSerializer):
+    """Generates code for accessing fields as if they were a hybrid object.
+
+    Hybrid objects are objects that don't inherit from `Mapping`, but do
+    implement `__getitem__`.  This means we first have to attempt a lookup by
+    key, then fall back to looking up by instance variable.
+
+    For example, generates:
+
+    try:
+        value = obj['some_value']
+    except (KeyError, AttributeError, IndexError, TypeError):
+        value = obj.some_value
+    res['some_value'] = value
+    """
+    def serialize(self, attr_name, field_symbol,
+                  assignment_template, field_obj):
+        # type: (str, str, str, fields.Field) -> IndentedString
+        body = IndentedString()
+        body += 'try:'
+        with body.indent():
+            body += 'value = obj["{attr_name}"]'.format(attr_name=attr_name)
+        body += 'except (KeyError, AttributeError, IndexError, TypeError):'
+        with body.indent():
+            body += 'value = {attr_str}'.format(attr_str=attr_str(attr_name))
+        body += assignment_template.format('value')
+        return body
+
+
+ALL_SERIALIZER_CLASSES = [
+    InstanceSerializer,
+    DictSerializer,
+    HybridSerializer
+]  # type: Sequence[Type[FieldSerializer]]
+
+EXPECTED_TYPE_TO_CLASS = {
+    'object': InstanceSerializer,
+    'dict': DictSerializer,
+    'hybrid': HybridSerializer
+}  # type: Dict[str, Type[FieldSerializer]]
@@ -1,40 +1,65 @@
-import os
+import base64
+import re
 from contextlib import contextmanager
 
 if False:  # pylint: disable=using-constant-test
     # pylint: disable=unused-import
-    from typing import List, Union
+    from typing import List, Tuple, Union
+
+
+# Regular Expression for identifying a valid Python identifier name.
+_VALID_IDENTIFIER = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*\Z')
 
 
 class IndentedString(object):
     """Utility class for printing indented strings via a context manager.
 
+    Lines are stored along with their indentation level and only joined
+    together when converted to a string, so appending is always O(1).
     """
+    __slots__ = ('result', '_indent', '_level')
+
     def __init__(self, content='', indent=4):
         # type: (Union[str, IndentedString], int) -> None
-        self.result = []  # type: List[str]
+        self.result = []  # type: List[Tuple[int, str]]
         self._indent = indent
-        self.__indents = ['']
+        self._level = 0
         if content:
             self.__iadd__(content)
 
     @contextmanager
     def indent(self):
-        self.__indents.append(self.__indents[-1] + (self._indent * ' '))
+        self._level += 1
         try:
             yield
         finally:
-            self.__indents.pop()
+            self._level -= 1
 
     def __iadd__(self, other):
         # type: (Union[str, IndentedString]) -> IndentedString
         if isinstance(other, IndentedString):
-            for line in other.result:
-                self.result.append(self.__indents[-1] + line)
+            level = self._level
+            self.result.extend((level + line_level, line)
+                               for line_level, line in other.result)
         else:
-            self.result.append(self.__indents[-1] + other)
+            self.result.append((self._level, other))
         return self
 
     def __str__(self):
         # type: () -> str
-        return os.linesep.join(self.result)
+        indent = self._indent * ' '
+        return '\n'.join(indent * level + line for level, line in self.result)
+
+
+def field_symbol_name(field_name):
+    # type: (str) -> str
+    """Generates the symbol name to be used when accessing a field in generated
+    code.
+
+    If the field name isn't a valid identifier name, synthesizes a name by
+    base64 encoding the fieldname.
+    """
+    if not _VALID_IDENTIFIER.match(field_name):
+        field_name = str(base64.b64encode(
+            field_name.encode('utf-8')).decode('utf-8').strip('='))
+    return '_field_{field_name}'.format(field_name=field_name)